@@ -0,0 +1,65 @@
+"""Incremental reminder sync from the canister's sequence-numbered change log"""
+from typing import Dict, Any
+
+class ReminderChangeFeed:
+    """Local mirror of canister reminders, kept in sync by applying change-feed deltas
+    
+    `reminders` (reminder id -> reminder record) is the public read API: code that
+    needs the current reminder set reads it instead of calling getAllReminders.
+    """
+    def __init__(self, icp_client, page_size: int = 500):
+        self.icp_client = icp_client
+        self.page_size = page_size
+        self.last_seq = 0
+        self.reminders: Dict[int, Dict[str, Any]] = {}
+    
+    def sync(self) -> Dict[str, Any]:
+        """Pull and apply every change since the last sync"""
+        applied = 0
+        resynced = False
+        while True:
+            result = self.icp_client.get_changes_since(self.last_seq, self.page_size)
+            if not result['success']:
+                return result
+            page = result['data']
+            
+            if page['resyncRequired']:
+                if resynced:
+                    return {"success": False, "error": "Change feed still out of range after resync"}
+                # Our position was trimmed from the log, reload once and continue from latestSeq
+                resync = self.resync(page['latestSeq'])
+                if not resync['success']:
+                    return resync
+                resynced = True
+                continue
+            
+            for change in page['changes']:
+                self.apply(change)
+                self.last_seq = change['seq']
+                applied += 1
+            
+            if len(page['changes']) < self.page_size or self.last_seq >= page['latestSeq']:
+                return {"success": True, "data": {"applied": applied, "lastSeq": self.last_seq}}
+    
+    def resync(self, latest_seq: int) -> Dict[str, Any]:
+        """Full reload; changes after latest_seq are replayed by the next page"""
+        result = self.icp_client.get_all_reminders()
+        if result['success']:
+            self.reminders = {int(reminder_id): reminder for reminder_id, reminder in result['data']}
+            self.last_seq = latest_seq
+        return result
+    
+    def apply(self, change: Dict[str, Any]) -> None:
+        kind = change['kind']
+        if isinstance(kind, dict):
+            kind = next(iter(kind))  # Candid variant, e.g. {"created": null}
+        
+        reminder_id = int(change['reminderId'])
+        reminder = change.get('reminder')
+        if isinstance(reminder, list):
+            reminder = reminder[0] if reminder else None  # Candid opt
+        
+        if kind == 'deleted' or reminder is None:
+            self.reminders.pop(reminder_id, None)
+        else:
+            self.reminders[reminder_id] = reminder
@@ -1,15 +1,20 @@
 import asyncio
 import re
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterator, Tuple
 import requests
 import json
 from uagents import Agent, Context, Model
 from uagents.setup import fund_agent_if_low
 import os
 from dotenv import load_dotenv
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from enum import Enum
+from recurrence import RecurrenceRule, RECURRENCE_PATTERN, parse_recurrence
+from rate_limit import RateLimiter, FairScheduler
+from outbound import OutboundBatcher
+from user_lock import UserLockManager
+from change_feed import ReminderChangeFeed
 
 # Load environment variables
 load_dotenv()
@@ -21,6 +26,18 @@ AGENT_SEED = os.getenv("AGENT_SEED", "reminder_agent_seed_123")
 # ICP Canister configuration
 CANISTER_URL = os.getenv("CANISTER_URL", "http://localhost:4943")
 CANISTER_ID = os.getenv("CANISTER_ID", "")
+CHANGE_FEED_INTERVAL = float(os.getenv("CHANGE_FEED_INTERVAL", "30"))  # Seconds between incremental syncs
+DUE_CHECK_INTERVAL = float(os.getenv("DUE_CHECK_INTERVAL", "60"))  # Seconds between recurring due checks
+
+# Rate limiting configuration
+USER_RATE_LIMIT = float(os.getenv("USER_RATE_LIMIT", "1"))  # Messages per second per user, 0 = unlimited
+USER_BURST = float(os.getenv("USER_BURST", "5"))
+GLOBAL_RATE_LIMIT = float(os.getenv("GLOBAL_RATE_LIMIT", "50"))  # Messages per second for the whole agent, 0 = unlimited
+GLOBAL_BURST = float(os.getenv("GLOBAL_BURST", "100"))
+MAX_PENDING_PER_USER = int(os.getenv("MAX_PENDING_PER_USER", "5"))
+
+# Outbound replies to the same recipient within this window share one envelope
+OUTBOUND_COALESCE_WINDOW = float(os.getenv("OUTBOUND_COALESCE_WINDOW", "0.05"))  # Seconds, 0 = send immediately
 
 class ConversationState(Enum):
     IDLE = "idle"
@@ -60,17 +77,54 @@ class ICPReminderClient:
         self.canister_id = canister_id
         self.base_url = f"{canister_url}/api/v2/canister/{canister_id}/call"
     
-    def create_reminder(self, title: str, date: str, time: str) -> Dict[str, Any]:
+    def create_reminder(self, title: str, date: str, time: str, recurrence: Optional[RecurrenceRule] = None) -> Dict[str, Any]:
         """Create a new reminder in the ICP canister"""
         try:
             # Convert date and time to timestamp
             datetime_str = f"{date} {time}"
             reminder_datetime = datetime.strptime(datetime_str, "%Y-%m-%d %H:%M")
-            reminder_time = int(reminder_datetime.timestamp() * 1_000_000_000)
             
+            # Recurring reminders are stored once, starting at the first occurrence
+            if recurrence:
+                recurrence = replace(recurrence, dtstart=reminder_datetime)
+                reminder_datetime = recurrence.next_occurrence(max(reminder_datetime, datetime.now())) or reminder_datetime
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        
+        record = self._reminder_record({"title": title, "description": title, "reminderTime": to_nanos(reminder_datetime)})
+        if recurrence:
+            return self._call("createRecurringReminder", f"({record}, \"{recurrence.to_rrule()}\")")
+        return self._call("createReminder", f"({record})")
+    
+    def update_reminder(self, reminder_id: int, reminder: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace a stored reminder in the ICP canister"""
+        return self._call("updateReminder", f"({reminder_id} : nat32, {self._reminder_record(reminder)})")
+    
+    def get_recurring_reminders(self) -> Dict[str, Any]:
+        """Get recurring reminders with their rules from the ICP canister"""
+        return self._call("getRecurringReminders")
+    
+    def get_all_reminders(self) -> Dict[str, Any]:
+        """Get all reminders from the ICP canister"""
+        return self._call("getAllReminders")
+    
+    def get_changes_since(self, since: int, limit: int) -> Dict[str, Any]:
+        """Get change-feed entries after the given sequence number"""
+        return self._call("getChangesSince", f"({since} : nat32, {limit} : nat32)")
+    
+    @staticmethod
+    def _reminder_record(reminder: Dict[str, Any]) -> str:
+        return (
+            f"record {{ title=\"{reminder['title']}\"; description=\"{reminder['description']}\"; "
+            f"reminderTime={int(reminder['reminderTime'])}; isCompleted={str(bool(reminder.get('isCompleted', False))).lower()}; "
+            f"createdAt={int(reminder.get('createdAt', 0))} }}"
+        )
+    
+    def _call(self, method_name: str, args: str = "()") -> Dict[str, Any]:
+        try:
             payload = {
-                "method_name": "createReminder",
-                "args": f"(record {{ title=\"{title}\"; description=\"{title}\"; reminderTime={reminder_time}; isCompleted=false; createdAt=0 }})"
+                "method_name": method_name,
+                "args": args
             }
             
             response = requests.post(self.base_url, json=payload)
@@ -80,10 +134,55 @@ class ICPReminderClient:
                 return {"success": False, "error": f"HTTP {response.status_code}"}
         except Exception as e:
             return {"success": False, "error": str(e)}
+    
+    def get_occurrences(self, window_start: datetime, window_end: datetime) -> Iterator[Tuple[Any, Dict[str, Any], RecurrenceRule, datetime]]:
+        """Lazily expand recurring reminders inside [window_start, window_end)"""
+        result = self.get_recurring_reminders()
+        if not result['success']:
+            return
+        
+        for reminder_id, reminder, rule in result['data'] or []:
+            recurrence = RecurrenceRule.from_rrule(rule)
+            for occurrence in recurrence.occurrences(window_start, window_end):
+                yield reminder_id, reminder, recurrence, occurrence
+    
+    def get_due_occurrences(self, since: datetime, now: Optional[datetime] = None) -> Iterator[Tuple[Any, Dict[str, Any], RecurrenceRule, datetime]]:
+        """Recurring occurrences that became due in [since, now)"""
+        return self.get_occurrences(since, now or datetime.now())
+
+def to_nanos(moment: datetime) -> int:
+    return int(moment.timestamp() * 1_000_000_000)
 
 # Initialize ICP client
 icp_client = ICPReminderClient(CANISTER_URL, CANISTER_ID)
 
+change_feed = ReminderChangeFeed(icp_client)
+
+class DueReminderChecker:
+    """Due checks for recurring reminders, rolling the stored time to the next occurrence"""
+    def __init__(self, icp_client):
+        self.icp_client = icp_client
+        self.checked_until = datetime.now()
+    
+    def check(self, now: Optional[datetime] = None) -> List[Tuple[Any, Dict[str, Any], datetime]]:
+        """Occurrences that became due since the previous check"""
+        now = now or datetime.now()
+        due = []
+        latest: Dict[Any, Tuple[Dict[str, Any], RecurrenceRule]] = {}
+        for reminder_id, reminder, recurrence, occurrence in self.icp_client.get_due_occurrences(self.checked_until, now):
+            due.append((reminder_id, reminder, occurrence))
+            latest[reminder_id] = (reminder, recurrence)
+        self.checked_until = now
+        
+        # Move reminderTime forward so the canister's getDueReminders sees the next occurrence
+        for reminder_id, (reminder, recurrence) in latest.items():
+            upcoming = recurrence.next_occurrence(now)
+            if upcoming:
+                self.icp_client.update_reminder(reminder_id, dict(reminder, reminderTime=to_nanos(upcoming)))
+        return due
+
+due_checker = DueReminderChecker(icp_client)
+
 class englishNLPProcessor:
     def __init__(self):
         # Relative date mappings
@@ -103,9 +202,15 @@ class englishNLPProcessor:
             'judul': None,
             'tanggal': None,
             'waktu': None,
+            'pengulangan': None,
             'missing_info': []
         }
         
+        # Extract recurrence rule (setiap hari, tiap senin, ...)
+        recurrence = self.extract_recurrence(message)
+        if recurrence:
+            result['pengulangan'] = recurrence
+        
         # Extract title by removing reminder keywords
         title = self.extract_title(message)
         if title:
@@ -125,8 +230,8 @@ class englishNLPProcessor:
         if date_str:
             result['tanggal'] = date_str
         else:
-            # Default to today if time is specified, otherwise ask
-            if time_str:
+            # Default to today if time is specified or the reminder recurs, otherwise ask
+            if time_str or recurrence:
                 result['tanggal'] = datetime.now().strftime("%Y-%m-%d")
             else:
                 result['missing_info'].append('tanggal')
@@ -150,6 +255,9 @@ class englishNLPProcessor:
         for prefix in prefixes:
             title = re.sub(prefix, '', title, flags=re.IGNORECASE).strip()
         
+        # Remove recurrence phrases
+        title = RECURRENCE_PATTERN.sub('', title).strip()
+        
         # Remove time and date references to get clean title
         time_patterns = [
             r'\bjam\s+\d{1,2}(:\d{2})?\b',
@@ -162,8 +270,9 @@ class englishNLPProcessor:
             title = re.sub(pattern, '', title, flags=re.IGNORECASE).strip()
         
         # Clean up and capitalize
+        title = re.sub(r'\s+', ' ', title).strip()
         if title:
-            return title.strip().capitalize()
+            return title.capitalize()
         return None
     
     def extract_time(self, message: str) -> Optional[str]:
@@ -202,6 +311,10 @@ class englishNLPProcessor:
         
         return None
     
+    def extract_recurrence(self, message: str) -> Optional[RecurrenceRule]:
+        """Extract recurrence (setiap hari, tiap senin, every monday) without start time"""
+        return parse_recurrence(message)
+    
     def extract_date(self, message: str) -> Optional[str]:
         """Extract date and convert to YYYY-MM-DD format"""
         message_lower = message.lower()
@@ -244,6 +357,10 @@ class ChatSessionManager:
 # Initialize processors
 nlp = englishNLPProcessor()
 session_manager = ChatSessionManager()
+user_locks = UserLockManager()
+rate_limiter = RateLimiter(USER_RATE_LIMIT, USER_BURST, GLOBAL_RATE_LIMIT, GLOBAL_BURST)
+scheduler = FairScheduler(rate_limiter, MAX_PENDING_PER_USER)
+outbox = OutboundBatcher("message", "json_data", OUTBOUND_COALESCE_WINDOW)
 
 class ReminderConversationHandler:
     def __init__(self, nlp_processor, icp_client):
@@ -271,21 +388,19 @@ class ReminderConversationHandler:
         
         # If all information is complete, create JSON and save
         if not info['missing_info']:
-            json_data = {
-                "judul": info['judul'],
-                "tanggal": info['tanggal'],
-                "waktu": info['waktu']
-            }
+            json_data = self.build_json_data(info)
             
             # Save to ICP canister
-            result = self.icp_client.create_reminder(
+            result = await asyncio.to_thread(
+                self.icp_client.create_reminder,
                 title=info['judul'],
                 date=info['tanggal'],
-                time=info['waktu']
+                time=info['waktu'],
+                recurrence=info['pengulangan']
             )
             
             if result['success']:
-                confirmation = f"Oke, saya simpan reminder: {info['judul']} {self.format_date_time(info['tanggal'], info['waktu'])}."
+                confirmation = f"Oke, saya simpan reminder: {info['judul']} {self.format_schedule(info)}."
                 return ChatResponse(
                     message=confirmation,
                     json_data=json_data
@@ -386,17 +501,15 @@ class ReminderConversationHandler:
         """Complete reminder creation with all information"""
         info = session.partial_reminder
         
-        json_data = {
-            "judul": info['judul'],
-            "tanggal": info['tanggal'],
-            "waktu": info['waktu']
-        }
+        json_data = self.build_json_data(info)
         
         # Save to ICP canister
-        result = self.icp_client.create_reminder(
+        result = await asyncio.to_thread(
+            self.icp_client.create_reminder,
             title=info['judul'],
             date=info['tanggal'],
-            time=info['waktu']
+            time=info['waktu'],
+            recurrence=info.get('pengulangan')
         )
         
         # Reset session
@@ -404,7 +517,7 @@ class ReminderConversationHandler:
         session.partial_reminder = {}
         
         if result['success']:
-            confirmation = f"Oke, saya simpan reminder: {info['judul']} {self.format_date_time(info['tanggal'], info['waktu'])}."
+            confirmation = f"Oke, saya simpan reminder: {info['judul']} {self.format_schedule(info)}."
             return ChatResponse(
                 message=confirmation,
                 json_data=json_data
@@ -415,6 +528,23 @@ class ReminderConversationHandler:
                 success=False
             )
     
+    def build_json_data(self, info: Dict[str, Any]) -> Dict[str, str]:
+        """Build JSON output for a complete reminder"""
+        json_data = {
+            "judul": info['judul'],
+            "tanggal": info['tanggal'],
+            "waktu": info['waktu']
+        }
+        if info.get('pengulangan'):
+            json_data["pengulangan"] = info['pengulangan'].to_rrule()
+        return json_data
+    
+    def format_schedule(self, info: Dict[str, Any]) -> str:
+        """Format schedule for confirmation, recurring or one-off"""
+        if info.get('pengulangan'):
+            return replace(info['pengulangan'], dtstart=datetime.strptime(info['waktu'], "%H:%M")).describe()
+        return self.format_date_time(info['tanggal'], info['waktu'])
+    
     def format_date_time(self, date_str: str, time_str: str) -> str:
         """Format date and time for natural language confirmation"""
         try:
@@ -438,21 +568,50 @@ conversation_handler = ReminderConversationHandler(nlp, icp_client)
 @reminder_agent.on_message(model=ChatMessage)
 async def handle_chat_message(ctx: Context, sender: str, msg: ChatMessage):
     """Handle incoming chat messages with english NLP processing"""
+    user_id = msg.user_id or sender
+    
+    # Flooding users are rejected immediately
+    if not rate_limiter.allow_user(user_id):
+        ctx.logger.warning(f"Rate limit exceeded for {user_id}")
+        await outbox.send(ctx, sender, ChatResponse(
+            message="Pesan terlalu cepat. Tunggu sebentar lalu coba lagi ya!",
+            success=False
+        ))
+        return
+    
+    async def job():
+        await process_chat_message(ctx, sender, msg, user_id)
+    
+    # Over global capacity: defer and serve users round-robin
+    if scheduler.has_pending() or not rate_limiter.allow_global():
+        if not scheduler.submit(user_id, job):
+            await outbox.send(ctx, sender, ChatResponse(
+                message="Masih banyak pesan kamu yang diproses. Coba lagi sebentar lagi ya!",
+                success=False
+            ))
+        return
+    
+    await job()
+
+async def process_chat_message(ctx: Context, sender: str, msg: ChatMessage, user_id: str):
+    """Process a chat message that passed rate limiting"""
     try:
         ctx.logger.info(f"Processing message from {sender}: {msg.message}")
         
-        # Get user session
-        session = session_manager.get_session(msg.user_id or sender)
-        
-        # Process message
-        response = await conversation_handler.process_message(session, msg.message)
-        
-        # Log JSON output if available
-        if response.json_data:
-            ctx.logger.info(f"Generated JSON: {json.dumps(response.json_data, ensure_ascii=False)}")
-        
-        ctx.logger.info(f"Sending response: {response.message}")
-        await ctx.send(sender, response)
+        # Messages from the same user are handled one at a time
+        async with user_locks.hold(user_id):
+            # Get user session
+            session = session_manager.get_session(user_id)
+            
+            # Process message
+            response = await conversation_handler.process_message(session, msg.message)
+            
+            # Log JSON output if available
+            if response.json_data:
+                ctx.logger.info(f"Generated JSON: {json.dumps(response.json_data, ensure_ascii=False)}")
+            
+            ctx.logger.info(f"Sending response: {response.message}")
+            await outbox.send(ctx, sender, response)
         
     except Exception as e:
         ctx.logger.error(f"Error processing message: {str(e)}")
@@ -460,9 +619,25 @@ async def handle_chat_message(ctx: Context, sender: str, msg: ChatMessage):
             message="Maaf, terjadi kesalahan. Coba lagi ya!",
             success=False
         )
-        await ctx.send(sender, error_response)
+        await outbox.send(ctx, sender, error_response)
 
 # Agent event handlers
+@reminder_agent.on_interval(period=CHANGE_FEED_INTERVAL)
+async def sync_change_feed(ctx: Context):
+    """Keep the local reminder mirror up to date incrementally"""
+    result = await asyncio.to_thread(change_feed.sync)
+    if not result['success']:
+        ctx.logger.warning(f"Change feed sync failed: {result.get('error', 'Unknown error')}")
+    elif result['data']['applied']:
+        ctx.logger.info(f"Applied {result['data']['applied']} reminder changes (seq {result['data']['lastSeq']})")
+
+@reminder_agent.on_interval(period=DUE_CHECK_INTERVAL)
+async def check_due_reminders(ctx: Context):
+    """Expand recurring reminders that became due since the last check"""
+    due = await asyncio.to_thread(due_checker.check)
+    for reminder_id, reminder, occurrence in due:
+        ctx.logger.info(f"⏰ Reminder due: {reminder.get('title')} (#{reminder_id}) at {occurrence.strftime('%Y-%m-%d %H:%M')}")
+
 @reminder_agent.on_event("startup")
 async def startup_handler(ctx: Context):
     ctx.logger.info(f"english Reminder Agent started with address: {reminder_agent.address}")
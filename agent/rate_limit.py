@@ -0,0 +1,128 @@
+"""Per-user and global rate limiting with round-robin scheduling of deferred work"""
+import asyncio
+from collections import OrderedDict, deque
+from time import monotonic
+from typing import Optional, Dict, Callable, Awaitable, Deque, Set
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+    
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+    
+    def take(self, rate: float, burst: float, now: float) -> bool:
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+    
+    def wait_time(self, rate: float, burst: float, now: float) -> float:
+        tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        return 0.0 if tokens >= 1 else (1 - tokens) / rate
+
+class RateLimiter:
+    """Per-user and global token buckets, O(1) per check with idle eviction; a rate of 0 disables that limit"""
+    def __init__(self, user_rate: float, user_burst: float, global_rate: float, global_burst: float,
+                 clock: Callable[[], float] = monotonic):
+        if user_rate < 0 or global_rate < 0:
+            raise ValueError("Rate limits must be >= 0 (0 disables the limit)")
+        if (user_rate and user_burst < 1) or (global_rate and global_burst < 1):
+            raise ValueError("Burst must be >= 1 when the rate limit is enabled")
+        
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.clock = clock
+        # An idle bucket is full again after this long, so dropping it loses nothing
+        self.idle_after = user_burst / user_rate if user_rate else 0.0
+        self.user_buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.global_bucket = TokenBucket(global_burst, clock())
+    
+    def allow_user(self, user_id: str) -> bool:
+        if not self.user_rate:
+            return True
+        now = self.clock()
+        self.evict_idle(now)
+        bucket = self.user_buckets.get(user_id)
+        if bucket is None:
+            bucket = self.user_buckets[user_id] = TokenBucket(self.user_burst, now)
+        else:
+            self.user_buckets.move_to_end(user_id)
+        return bucket.take(self.user_rate, self.user_burst, now)
+    
+    def allow_global(self) -> bool:
+        if not self.global_rate:
+            return True
+        return self.global_bucket.take(self.global_rate, self.global_burst, self.clock())
+    
+    def global_wait_time(self) -> float:
+        if not self.global_rate:
+            return 0.0
+        return self.global_bucket.wait_time(self.global_rate, self.global_burst, self.clock())
+    
+    def evict_idle(self, now: float) -> None:
+        # Buckets are ordered by last use, so only the stale head is ever inspected
+        while self.user_buckets:
+            user_id, bucket = next(iter(self.user_buckets.items()))
+            if now - bucket.updated < self.idle_after:
+                break
+            del self.user_buckets[user_id]
+
+class FairScheduler:
+    """Deferred work served round-robin across users as global capacity frees up"""
+    def __init__(self, rate_limiter: RateLimiter, max_pending_per_user: int):
+        self.rate_limiter = rate_limiter
+        self.max_pending_per_user = max_pending_per_user
+        self.queues: Dict[str, Deque[Callable[[], Awaitable[None]]]] = {}
+        self.ready: Deque[str] = deque()  # Users with pending work, in round-robin order
+        self.running: Set[asyncio.Task] = set()
+        self.wakeup: Optional[asyncio.Event] = None
+        self.worker: Optional[asyncio.Task] = None
+    
+    def has_pending(self) -> bool:
+        return bool(self.ready)
+    
+    def submit(self, user_id: str, job: Callable[[], Awaitable[None]]) -> bool:
+        """Queue a job; returns False when the user's queue is full"""
+        queue = self.queues.get(user_id)
+        if queue is None:
+            queue = self.queues[user_id] = deque()
+            self.ready.append(user_id)
+        elif len(queue) >= self.max_pending_per_user:
+            return False
+        queue.append(job)
+        
+        if self.worker is None or self.worker.done():
+            self.wakeup = asyncio.Event()
+            self.worker = asyncio.create_task(self.run())
+        self.wakeup.set()
+        return True
+    
+    async def run(self) -> None:
+        while True:
+            if not self.ready:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+            
+            wait = self.rate_limiter.global_wait_time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if not self.rate_limiter.allow_global():
+                continue
+            
+            user_id = self.ready.popleft()
+            queue = self.queues[user_id]
+            job = queue.popleft()
+            if queue:
+                self.ready.append(user_id)
+            else:
+                del self.queues[user_id]
+            
+            task = asyncio.create_task(job())
+            self.running.add(task)
+            task.add_done_callback(self.running.discard)
@@ -0,0 +1,122 @@
+"""Recurring reminder rules: compact RRULE-like records expanded lazily"""
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, date
+from typing import Optional, Iterator, Tuple
+
+WEEKDAY_CODES = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+WEEKDAY_NAMES_ID = ["Senin", "Selasa", "Rabu", "Kamis", "Jumat", "Sabtu", "Minggu"]
+
+@dataclass(frozen=True)
+class RecurrenceRule:
+    """Compact RRULE-like recurrence, stored once and expanded lazily"""
+    freq: str  # "DAILY" or "WEEKLY"
+    interval: int = 1
+    by_day: Tuple[int, ...] = ()  # 0 = Monday ... 6 = Sunday
+    dtstart: Optional[datetime] = None
+    until: Optional[date] = None
+    
+    def to_rrule(self) -> str:
+        parts = [f"FREQ={self.freq}", f"INTERVAL={self.interval}"]
+        if self.by_day:
+            parts.append("BYDAY=" + ",".join(WEEKDAY_CODES[day] for day in self.by_day))
+        if self.dtstart:
+            parts.append(f"DTSTART={self.dtstart.strftime('%Y%m%dT%H%M%S')}")
+        if self.until:
+            parts.append(f"UNTIL={self.until.strftime('%Y%m%d')}")
+        return ";".join(parts)
+    
+    @classmethod
+    def from_rrule(cls, rule: str) -> "RecurrenceRule":
+        fields = dict(part.split("=", 1) for part in rule.split(";") if "=" in part)
+        return cls(
+            freq=fields["FREQ"],
+            interval=int(fields.get("INTERVAL", 1)),
+            by_day=tuple(WEEKDAY_CODES.index(code) for code in fields["BYDAY"].split(",")) if fields.get("BYDAY") else (),
+            dtstart=datetime.strptime(fields["DTSTART"], "%Y%m%dT%H%M%S") if fields.get("DTSTART") else None,
+            until=datetime.strptime(fields["UNTIL"], "%Y%m%d").date() if fields.get("UNTIL") else None
+        )
+    
+    def occurrences(self, window_start: datetime, window_end: datetime) -> Iterator[datetime]:
+        """Yield occurrences in [window_start, window_end) without expanding anything outside the window"""
+        if self.dtstart is None:
+            return
+        
+        anchor = self.dtstart.date()
+        week_anchor = anchor - timedelta(days=anchor.weekday())
+        by_day = self.by_day or (anchor.weekday(),)
+        
+        day = max(window_start.date(), anchor)
+        last_day = window_end.date()
+        if self.until and self.until < last_day:
+            last_day = self.until
+        
+        while day <= last_day:
+            if self.freq == "DAILY":
+                matches = (day - anchor).days % self.interval == 0
+            else:
+                matches = day.weekday() in by_day and ((day - week_anchor).days // 7) % self.interval == 0
+            
+            if matches:
+                occurrence = datetime.combine(day, self.dtstart.time())
+                if window_start <= occurrence < window_end:
+                    yield occurrence
+            day += timedelta(days=1)
+    
+    def next_occurrence(self, after: datetime) -> Optional[datetime]:
+        """First occurrence at or after the given time"""
+        period = timedelta(days=7 * self.interval if self.freq == "WEEKLY" else self.interval)
+        return next(self.occurrences(after, after + period + timedelta(days=1)), None)
+    
+    def describe(self) -> str:
+        """Natural language description, e.g. 'setiap Senin jam 08:00'"""
+        if self.freq == "DAILY":
+            text = "setiap hari" if self.interval == 1 else f"setiap {self.interval} hari"
+        elif self.by_day == (0, 1, 2, 3, 4):
+            text = "setiap hari kerja"
+        else:
+            days = ", ".join(WEEKDAY_NAMES_ID[day] for day in self.by_day) or "minggu"
+            text = f"setiap {days}" if self.interval == 1 else f"setiap {self.interval} minggu ({days})"
+        if self.dtstart:
+            text += f" jam {self.dtstart.strftime('%H:%M')}"
+        return text
+
+# Recurrence weekday mappings
+WEEKDAYS = {
+    'senin': 0, 'monday': 0,
+    'selasa': 1, 'tuesday': 1,
+    'rabu': 2, 'wednesday': 2,
+    'kamis': 3, 'thursday': 3,
+    "jumat": 4, "jum'at": 4, 'friday': 4,
+    'sabtu': 5, 'saturday': 5,
+    'hari minggu': 6, 'ahad': 6, 'sunday': 6
+}
+
+_WEEKDAY_NAMES = "|".join(re.escape(name) for name in sorted(WEEKDAYS, key=len, reverse=True))
+
+# Recurrence always needs a keyword (setiap/tiap/every), so "laporan harian" stays a title
+RECURRENCE_PATTERN = re.compile(
+    r"\b(?:setiap|tiap|every)\s+(?:"
+    r"(?P<weekdays>(?:hari\s+)?(?:" + _WEEKDAY_NAMES + r")(?:\s*(?:,|dan|and|&)\s*(?:hari\s+)?(?:" + _WEEKDAY_NAMES + r"))*)"
+    r"|(?P<workdays>hari\s+kerja|weekdays?)"
+    r"|(?:(?P<count>\d+)\s+)?(?P<unit>hari|days?|minggu|weeks?)"
+    r")\b"
+)
+
+def parse_recurrence(message: str) -> Optional[RecurrenceRule]:
+    """Extract recurrence (setiap hari, tiap senin, every monday) without start time"""
+    match = RECURRENCE_PATTERN.search(message.lower())
+    if not match:
+        return None
+    
+    if match.group('weekdays'):
+        names = re.findall(_WEEKDAY_NAMES, match.group('weekdays'))
+        return RecurrenceRule(freq="WEEKLY", by_day=tuple(sorted({WEEKDAYS[name] for name in names})))
+    
+    if match.group('workdays'):
+        return RecurrenceRule(freq="WEEKLY", by_day=(0, 1, 2, 3, 4))
+    
+    interval = max(int(match.group('count')) if match.group('count') else 1, 1)
+    if match.group('unit') in ('hari', 'day', 'days'):
+        return RecurrenceRule(freq="DAILY", interval=interval)
+    return RecurrenceRule(freq="WEEKLY", interval=interval)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Agent modules are imported as top-level scripts (python main.py from agent/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,145 @@
+from change_feed import ReminderChangeFeed
+
+
+class FakeCanister:
+    """In-memory stand-in for the canister change log, using the Candid JSON encodings"""
+
+    def __init__(self, max_retained=100):
+        self.reminders = {}
+        self.log = []
+        self.last_seq = 0
+        self.oldest_seq = 1
+        self.max_retained = max_retained
+        self.calls = []
+
+    def record(self, kind, reminder_id, reminder=None):
+        self.last_seq += 1
+        if kind == "deleted":
+            self.reminders.pop(reminder_id, None)
+        else:
+            self.reminders[reminder_id] = reminder
+        self.log.append({
+            "seq": self.last_seq,
+            "kind": {kind: None},
+            "reminderId": reminder_id,
+            "reminder": [reminder] if reminder is not None else [],
+            "at": 0,
+        })
+        while len(self.log) > self.max_retained:
+            self.log.pop(0)
+            self.oldest_seq += 1
+
+    def get_changes_since(self, since, limit):
+        self.calls.append(("getChangesSince", since, limit))
+        page = {"latestSeq": self.last_seq, "oldestSeq": self.oldest_seq}
+        if since > self.last_seq or since < self.oldest_seq - 1:
+            return {"success": True, "data": dict(page, changes=[], resyncRequired=True)}
+        changes = [change for change in self.log if change["seq"] > since][:limit]
+        return {"success": True, "data": dict(page, changes=changes, resyncRequired=False)}
+
+    def get_all_reminders(self):
+        self.calls.append(("getAllReminders",))
+        return {"success": True, "data": [[reminder_id, reminder] for reminder_id, reminder in self.reminders.items()]}
+
+
+def record(title):
+    return {"title": title, "description": title, "reminderTime": 0, "isCompleted": False, "createdAt": 0}
+
+
+def test_sync_pages_through_every_change():
+    canister = FakeCanister()
+    for i in range(7):
+        canister.record("created", i, record(f"r{i}"))
+    feed = ReminderChangeFeed(canister, page_size=3)
+
+    result = feed.sync()
+
+    assert result == {"success": True, "data": {"applied": 7, "lastSeq": 7}}
+    assert [call[1] for call in canister.calls] == [0, 3, 6]
+    assert feed.reminders == canister.reminders
+
+    # Nothing new: one empty page
+    assert feed.sync()["data"] == {"applied": 0, "lastSeq": 7}
+
+
+def test_updates_and_deletes_are_applied():
+    canister = FakeCanister()
+    canister.record("created", 1, record("Meeting"))
+    canister.record("created", 2, record("Olahraga"))
+    feed = ReminderChangeFeed(canister)
+    feed.sync()
+
+    canister.record("updated", 1, record("Meeting tim"))
+    canister.record("completed", 2, dict(record("Olahraga"), isCompleted=True))
+    canister.record("deleted", 1)
+    assert feed.sync()["data"] == {"applied": 3, "lastSeq": 5}
+    assert feed.reminders == {2: dict(record("Olahraga"), isCompleted=True)}
+
+
+def test_trimmed_position_resyncs_then_replays_newer_changes():
+    canister = FakeCanister(max_retained=3)
+    feed = ReminderChangeFeed(canister, page_size=2)
+    canister.record("created", 1, record("a"))
+    feed.sync()
+
+    for i in range(2, 8):
+        canister.record("created", i, record(f"r{i}"))
+    canister.record("deleted", 2)  # seq 8; the log now only holds seq 6..8
+
+    result = feed.sync()
+
+    assert result["success"]
+    assert ("getAllReminders",) in canister.calls
+    assert feed.last_seq == 8
+    assert feed.reminders == canister.reminders
+    assert 2 not in feed.reminders
+
+
+def test_changes_after_the_resync_snapshot_are_replayed():
+    canister = FakeCanister(max_retained=2)
+    for i in range(1, 5):
+        canister.record("created", i, record(f"r{i}"))
+    feed = ReminderChangeFeed(canister)
+    feed.last_seq = 1  # Older than the retained log
+    original = canister.get_changes_since
+
+    def get_changes_since(since, limit):
+        page = original(since, limit)
+        if page["data"]["resyncRequired"]:
+            # A write lands between the page and the full reload
+            canister.record("deleted", 3)
+        return page
+    canister.get_changes_since = get_changes_since
+
+    assert feed.sync()["success"]
+    assert feed.last_seq == 5
+    assert feed.reminders == canister.reminders == {1: record("r1"), 2: record("r2"), 4: record("r4")}
+
+
+def test_persistent_resync_is_reported_as_an_error():
+    class AlwaysTrimmed(FakeCanister):
+        def get_changes_since(self, since, limit):
+            return {"success": True, "data": {"changes": [], "latestSeq": 0, "oldestSeq": 1, "resyncRequired": True}}
+
+    result = ReminderChangeFeed(AlwaysTrimmed()).sync()
+    assert not result["success"]
+
+
+def test_failed_call_is_returned_without_moving_position():
+    class Down(FakeCanister):
+        def get_changes_since(self, since, limit):
+            return {"success": False, "error": "HTTP 503"}
+
+    feed = ReminderChangeFeed(Down())
+    assert feed.sync() == {"success": False, "error": "HTTP 503"}
+    assert feed.last_seq == 0
+
+
+def test_apply_accepts_plain_and_candid_encodings():
+    feed = ReminderChangeFeed(FakeCanister())
+    feed.apply({"seq": 1, "kind": "created", "reminderId": "4", "reminder": record("plain")})
+    feed.apply({"seq": 2, "kind": {"updated": None}, "reminderId": 5, "reminder": [record("candid")]})
+    assert feed.reminders == {4: record("plain"), 5: record("candid")}
+    feed.apply({"seq": 3, "kind": {"deleted": None}, "reminderId": 4, "reminder": []})
+    feed.apply({"seq": 4, "kind": {"deleted": None}, "reminderId": 99, "reminder": []})
+    assert feed.reminders == {5: record("candid")}
@@ -0,0 +1,69 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Optional
+
+from outbound import OutboundBatcher
+
+
+@dataclass
+class Reply:
+    message: str
+    success: bool = True
+    json_data: Optional[dict] = None
+
+
+class FakeContext:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, recipient, message):
+        self.sent.append((recipient, message))
+
+
+def batcher(window=0.01, max_batch=20):
+    return OutboundBatcher("message", "json_data", window, max_batch=max_batch)
+
+
+def test_merge_joins_consecutive_replies():
+    merged = batcher().merge([Reply("a"), Reply("b", json_data={"k": "v"}), Reply("c")])
+    assert merged == [Reply("a\n\nb\n\nc", json_data={"k": "v"})]
+
+
+def test_merge_never_overwrites_payloads():
+    merged = batcher().merge([Reply("a", json_data={"k": "1"}), Reply("b", json_data={"k": "2"})])
+    assert merged == [Reply("a", json_data={"k": "1"}), Reply("b", json_data={"k": "2"})]
+
+
+def test_merge_keeps_different_success_values_apart():
+    merged = batcher().merge([Reply("ok"), Reply("slow down", success=False), Reply("ok again")])
+    assert [reply.success for reply in merged] == [True, False, True]
+
+
+def test_send_coalesces_per_recipient_within_window():
+    async def scenario():
+        ctx, outbox = FakeContext(), batcher()
+        await outbox.send(ctx, "alice", Reply("one"))
+        await outbox.send(ctx, "bob", Reply("hi"))
+        await outbox.send(ctx, "alice", Reply("two"))
+        assert ctx.sent == []
+        await asyncio.sleep(0.05)
+        return ctx.sent, outbox
+
+    sent, outbox = asyncio.run(scenario())
+    assert sorted(sent, key=lambda item: item[0]) == [("alice", Reply("one\n\ntwo")), ("bob", Reply("hi"))]
+    assert not outbox.pending and not outbox.flushers
+
+
+def test_send_flushes_immediately_at_max_batch_or_zero_window():
+    async def scenario():
+        ctx = FakeContext()
+        outbox = batcher(window=10, max_batch=2)
+        await outbox.send(ctx, "alice", Reply("one"))
+        await outbox.send(ctx, "alice", Reply("two"))
+        immediate = FakeContext()
+        await batcher(window=0).send(immediate, "bob", Reply("hi"))
+        return ctx.sent, immediate.sent
+
+    batched, immediate = asyncio.run(scenario())
+    assert batched == [("alice", Reply("one\n\ntwo"))]
+    assert immediate == [("bob", Reply("hi"))]
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from rate_limit import TokenBucket, RateLimiter, FairScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills_up_to_burst():
+    bucket = TokenBucket(2, 0.0)
+    assert bucket.take(rate=1, burst=2, now=0.0)
+    assert bucket.take(rate=1, burst=2, now=0.0)
+    assert not bucket.take(rate=1, burst=2, now=0.5)
+    assert bucket.wait_time(rate=1, burst=2, now=0.5) == pytest.approx(0.5)
+    assert bucket.take(rate=1, burst=2, now=1.0)
+    # A long pause refills only to the burst size
+    bucket.take(rate=1, burst=2, now=100.0)
+    assert bucket.tokens == pytest.approx(1)
+
+
+def test_user_limit_is_per_user():
+    clock = FakeClock()
+    limiter = RateLimiter(user_rate=1, user_burst=2, global_rate=0, global_burst=0, clock=clock)
+    assert [limiter.allow_user("a") for _ in range(3)] == [True, True, False]
+    assert limiter.allow_user("b")
+    clock.now = 1.0
+    assert limiter.allow_user("a")
+
+
+def test_idle_buckets_are_evicted():
+    clock = FakeClock()
+    limiter = RateLimiter(user_rate=1, user_burst=2, global_rate=0, global_burst=0, clock=clock)
+    limiter.allow_user("a")
+    clock.now = 1.0
+    limiter.allow_user("b")
+    clock.now = 2.5  # "a" has been idle for burst / rate seconds, "b" has not
+    limiter.allow_user("c")
+    assert list(limiter.user_buckets) == ["b", "c"]
+
+
+def test_zero_rate_disables_limit():
+    limiter = RateLimiter(user_rate=0, user_burst=0, global_rate=0, global_burst=0)
+    assert all(limiter.allow_user("a") for _ in range(100))
+    assert all(limiter.allow_global() for _ in range(100))
+    assert limiter.global_wait_time() == 0.0
+    assert not limiter.user_buckets
+
+
+def test_invalid_config_is_rejected():
+    with pytest.raises(ValueError):
+        RateLimiter(user_rate=-1, user_burst=1, global_rate=1, global_burst=1)
+    with pytest.raises(ValueError):
+        RateLimiter(user_rate=1, user_burst=0, global_rate=1, global_burst=1)
+
+
+def test_scheduler_serves_users_round_robin():
+    async def scenario():
+        scheduler = FairScheduler(RateLimiter(0, 0, 0, 0), max_pending_per_user=10)
+        order = []
+
+        def job(name):
+            async def run():
+                order.append(name)
+            return run
+
+        for i in range(3):
+            scheduler.submit("a", job(f"a{i}"))
+        scheduler.submit("b", job("b0"))
+        scheduler.submit("c", job("c0"))
+        scheduler.submit("b", job("b1"))
+        await asyncio.sleep(0.05)
+        scheduler.worker.cancel()
+        return order, scheduler
+
+    order, scheduler = asyncio.run(scenario())
+    assert order == ["a0", "b0", "c0", "a1", "b1", "a2"]
+    assert not scheduler.queues and not scheduler.ready
+
+
+def test_scheduler_bounds_pending_per_user():
+    async def scenario():
+        scheduler = FairScheduler(RateLimiter(0, 0, 1, 1, clock=lambda: 0.0), max_pending_per_user=2)
+
+        async def noop():
+            pass
+
+        accepted = [scheduler.submit("a", noop) for _ in range(4)]
+        scheduler.worker.cancel()
+        return accepted
+
+    assert asyncio.run(scenario()) == [True, True, False, False]
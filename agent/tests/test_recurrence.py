@@ -0,0 +1,73 @@
+from datetime import datetime, date
+
+import pytest
+
+from recurrence import RecurrenceRule, parse_recurrence
+
+
+def test_daily_occurrences_respect_interval_and_window():
+    rule = RecurrenceRule(freq="DAILY", interval=3, dtstart=datetime(2026, 10, 1, 7, 0))
+    occurrences = list(rule.occurrences(datetime(2026, 10, 19, 8, 0), datetime(2026, 10, 26)))
+    assert occurrences == [datetime(2026, 10, 22, 7, 0), datetime(2026, 10, 25, 7, 0)]
+
+
+def test_weekly_occurrences_use_by_day_and_week_interval():
+    rule = RecurrenceRule(freq="WEEKLY", interval=2, by_day=(0, 3), dtstart=datetime(2026, 10, 21, 8, 0))
+    occurrences = list(rule.occurrences(datetime(2026, 10, 19), datetime(2026, 11, 10)))
+    assert occurrences == [
+        datetime(2026, 10, 22, 8, 0),
+        datetime(2026, 11, 2, 8, 0),
+        datetime(2026, 11, 5, 8, 0),
+    ]
+
+
+def test_occurrences_stop_at_until_and_never_before_dtstart():
+    rule = RecurrenceRule(freq="DAILY", dtstart=datetime(2026, 10, 20, 9, 0), until=date(2026, 10, 22))
+    occurrences = list(rule.occurrences(datetime(2026, 10, 1), datetime(2026, 12, 1)))
+    assert occurrences == [datetime(2026, 10, d, 9, 0) for d in (20, 21, 22)]
+
+
+def test_occurrences_without_dtstart_yield_nothing():
+    assert list(RecurrenceRule(freq="DAILY").occurrences(datetime(2026, 1, 1), datetime(2027, 1, 1))) == []
+
+
+def test_next_occurrence_includes_the_given_time():
+    rule = RecurrenceRule(freq="WEEKLY", by_day=(0,), dtstart=datetime(2026, 10, 19, 8, 0))
+    assert rule.next_occurrence(datetime(2026, 10, 19, 8, 0)) == datetime(2026, 10, 19, 8, 0)
+    assert rule.next_occurrence(datetime(2026, 10, 19, 8, 1)) == datetime(2026, 10, 26, 8, 0)
+
+
+@pytest.mark.parametrize("rule", [
+    RecurrenceRule(freq="DAILY"),
+    RecurrenceRule(freq="DAILY", interval=2, dtstart=datetime(2026, 10, 19, 17, 0)),
+    RecurrenceRule(freq="WEEKLY", by_day=(0, 1, 2, 3, 4), dtstart=datetime(2026, 10, 19, 9, 0), until=date(2026, 12, 31)),
+])
+def test_rrule_round_trip(rule):
+    assert RecurrenceRule.from_rrule(rule.to_rrule()) == rule
+
+
+def test_to_rrule_format():
+    rule = RecurrenceRule(freq="WEEKLY", by_day=(0, 3), dtstart=datetime(2026, 10, 19, 8, 0))
+    assert rule.to_rrule() == "FREQ=WEEKLY;INTERVAL=1;BYDAY=MO,TH;DTSTART=20261019T080000"
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("ingatkan saya minum obat setiap hari jam 8", RecurrenceRule(freq="DAILY")),
+    ("ingatkan saya siram tanaman tiap 2 hari jam 17:00", RecurrenceRule(freq="DAILY", interval=2)),
+    ("ingatkan saya olahraga tiap senin dan kamis jam 6", RecurrenceRule(freq="WEEKLY", by_day=(0, 3))),
+    ("ingatkan saya gereja setiap hari minggu jam 7", RecurrenceRule(freq="WEEKLY", by_day=(6,))),
+    ("jangan lupa bayar listrik setiap minggu", RecurrenceRule(freq="WEEKLY")),
+    ("remind me standup every weekday jam 9", RecurrenceRule(freq="WEEKLY", by_day=(0, 1, 2, 3, 4))),
+    ("ingatkan saya piket setiap hari kerja", RecurrenceRule(freq="WEEKLY", by_day=(0, 1, 2, 3, 4))),
+])
+def test_parse_recurrence(message, expected):
+    assert parse_recurrence(message) == expected
+
+
+@pytest.mark.parametrize("message", [
+    "ingatkan saya kirim laporan harian besok jam 9",
+    "ingatkan saya daily standup besok jam 9",
+    "ingatkan saya meeting minggu depan jam 10",
+])
+def test_parse_recurrence_requires_keyword(message):
+    assert parse_recurrence(message) is None
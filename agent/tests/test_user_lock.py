@@ -0,0 +1,82 @@
+import asyncio
+
+from user_lock import UserLockManager
+
+
+def test_messages_from_one_user_run_in_order():
+    async def scenario():
+        locks = UserLockManager()
+        events = []
+        
+        async def handle(name, delay):
+            async with locks.hold("alice"):
+                events.append(f"start {name}")
+                await asyncio.sleep(delay)
+                events.append(f"end {name}")
+        
+        await asyncio.gather(handle("first", 0.03), handle("second", 0.0), handle("third", 0.0))
+        return events
+    
+    assert asyncio.run(scenario()) == [
+        "start first", "end first",
+        "start second", "end second",
+        "start third", "end third",
+    ]
+
+
+def test_different_users_run_in_parallel():
+    async def scenario():
+        locks = UserLockManager()
+        both_inside = asyncio.Event()
+        inside = set()
+        
+        async def handle(user_id):
+            async with locks.hold(user_id):
+                inside.add(user_id)
+                if len(inside) == 2:
+                    both_inside.set()
+                # Deadlocks (and times out) if the second user has to wait for the first
+                await asyncio.wait_for(both_inside.wait(), timeout=1)
+        
+        await asyncio.gather(handle("alice"), handle("bob"))
+        return locks
+    
+    assert asyncio.run(scenario()).locks == {}
+
+
+def test_entry_is_dropped_when_last_holder_leaves():
+    async def scenario():
+        locks = UserLockManager()
+        release = asyncio.Event()
+        
+        async def first():
+            async with locks.hold("alice"):
+                await release.wait()
+        
+        async def second():
+            async with locks.hold("alice"):
+                pass
+        
+        tasks = [asyncio.create_task(first()), asyncio.create_task(second())]
+        await asyncio.sleep(0)
+        holders = locks.locks["alice"].holders
+        release.set()
+        await asyncio.gather(*tasks)
+        return holders, locks
+    
+    holders, locks = asyncio.run(scenario())
+    assert holders == 2
+    assert "alice" not in locks.locks
+
+
+def test_entry_is_dropped_when_holder_raises():
+    async def scenario():
+        locks = UserLockManager()
+        try:
+            async with locks.hold("alice"):
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        return locks
+    
+    assert asyncio.run(scenario()).locks == {}
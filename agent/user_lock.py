@@ -0,0 +1,30 @@
+"""Keyed async locks: messages from one user run in order, different users run in parallel"""
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, AsyncIterator
+
+@dataclass
+class UserLock:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    holders: int = 0
+
+class UserLockManager:
+    """Keyed async locks: serialize messages per user, different users run in parallel"""
+    def __init__(self):
+        self.locks: Dict[str, UserLock] = {}
+    
+    @asynccontextmanager
+    async def hold(self, user_id: str) -> AsyncIterator[None]:
+        entry = self.locks.get(user_id)
+        if entry is None:
+            entry = self.locks[user_id] = UserLock()
+        entry.holders += 1
+        try:
+            async with entry.lock:
+                yield
+        finally:
+            entry.holders -= 1
+            # Release idle user queues
+            if entry.holders == 0:
+                del self.locks[user_id]
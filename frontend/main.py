@@ -5,13 +5,20 @@ Autonomous AI agent untuk berinteraksi dengan ICP Canister backend
 
 from uagents import Agent, Context, Model
 from uagents.setup import fund_agent_if_low
+import asyncio
 import requests
 import json
 import re
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Set, Any, Hashable
+from collections import OrderedDict
 import os
 from dotenv import load_dotenv
+from outbound import OutboundBatcher
+from search_index import ReminderCatalog, unambiguous_match
+from single_flight import SingleFlight
 
 # Load environment variables
 load_dotenv()
@@ -20,6 +27,10 @@ load_dotenv()
 AGENT_SEED = os.getenv("AGENT_SEED", "reminder_agent_seed_phrase_2024")
 AGENT_PORT = int(os.getenv("AGENT_PORT", "8001"))
 ICP_CANISTER_URL = os.getenv("ICP_CANISTER_URL", "http://localhost:4943")
+ICP_QUERY_TTL = float(os.getenv("ICP_QUERY_TTL", "0"))  # Seconds, 0 = no micro-cache
+INDEX_REFRESH_TTL = float(os.getenv("INDEX_REFRESH_TTL", "300"))  # Seconds between background reloads of local indexes
+DELETE_MATCH_SCORE = float(os.getenv("DELETE_MATCH_SCORE", "0.9"))  # Title score needed to delete without confirmation
+OUTBOUND_COALESCE_WINDOW = float(os.getenv("OUTBOUND_COALESCE_WINDOW", "0.05"))  # Seconds, 0 = send immediately
 
 # Initialize agent
 agent = Agent(
@@ -45,9 +56,16 @@ class ReminderResponse(Model):
 class ICPClient:
     """Client untuk berinteraksi dengan ICP Canister"""
     
-    def __init__(self, canister_url: str):
+    INDEX_BATCH = 500  # Reminders indexed per _index_lock hold
+    MISS_REFRESH_INTERVAL = 30.0  # Seconds before a user's list is fetched again after an index miss
+    
+    def __init__(self, canister_url: str, query_ttl: float = 0.0):
         self.canister_url = canister_url.rstrip('/')
         self.canister_id = "reminder_backend"  # Default canister name
+        self.catalog = ReminderCatalog()
+        self._index_lock = threading.Lock()
+        self._user_refreshed: "OrderedDict[str, float]" = OrderedDict()  # user -> monotonic time a miss may refetch again
+        self.queries = SingleFlight(ttl=query_ttl)
     
     def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Dict:
         """Make HTTP request to ICP canister"""
@@ -83,30 +101,156 @@ class ICPClient:
         if user_id:
             data["userId"] = user_id
             
-        return self._make_request("POST", "addReminder", data)
+        result = self._track(self._make_request("POST", "addReminder", data))
+        self.queries.invalidate(
+            self._query_key("getReminders"),
+            self._query_key("getUpcomingReminders"),
+            self._query_key("getRemindersByDate", {"date": date})
+        )
+        return result
+    
+    def update_reminder(self, reminder_id: str, **fields) -> Dict:
+        """Update reminder (title, description, date, time)"""
+        data = {"id": reminder_id}
+        data.update({key: value for key, value in fields.items() if value is not None})
+        result = self._track(self._make_request("POST", "updateReminder", data))
+        self.queries.invalidate()  # The reminder may have moved between dates
+        return result
     
     def get_reminders(self) -> Dict:
         """Get all reminders from ICP canister"""
-        return self._make_request("GET", "getReminders")
+        return self._query("getReminders")
     
     def get_reminders_by_date(self, date: str) -> Dict:
         """Get reminders for specific date"""
-        return self._make_request("GET", "getRemindersByDate", {"date": date})
+        return self._query("getRemindersByDate", {"date": date})
     
     def get_upcoming_reminders(self) -> Dict:
         """Get upcoming reminders"""
-        return self._make_request("GET", "getUpcomingReminders")
+        return self._query("getUpcomingReminders")
     
     def delete_reminder(self, reminder_id: str) -> Dict:
         """Delete reminder by ID"""
-        return self._make_request("POST", "deleteReminder", {"id": reminder_id})
+        result = self._make_request("POST", "deleteReminder", {"id": reminder_id})
+        self.queries.invalidate()  # The old date of the reminder is not known here
+        if isinstance(result, dict) and "error" in result:
+            return result
+        
+        # Deleted here or already gone elsewhere: either way the id is stale locally
+        with self._index_lock:
+            self.catalog.remove(reminder_id)
+        if result is False or (isinstance(result, dict) and result.get("data") is False):
+            return {"error": "Reminder tidak ditemukan (mungkin sudah dihapus)"}
+        return result if isinstance(result, dict) else {"data": result}
+    
+    def search_reminders(self, search_term: str, user_id: Optional[str] = None, limit: int = 10) -> Dict:
+        """Search reminders by title/description via local inverted index"""
+        with self._index_lock:
+            results = self.catalog.search(search_term, limit=limit, user_id=user_id)
+        
+        # Miss: the reminder may have been created by another client since the last refresh
+        if not results and self._refresh_user(user_id):
+            with self._index_lock:
+                results = self.catalog.search(search_term, limit=limit, user_id=user_id)
+        return {"data": results}
+    
+    def find_reminders_by_title(self, title: str, user_id: Optional[str] = None, limit: int = 5) -> Dict:
+        """Fuzzy match reminder titles via local trigram index, best candidates first"""
+        with self._index_lock:
+            candidates = self.catalog.match_title(title, user_id=user_id, limit=limit)
+        
+        if not candidates and self._refresh_user(user_id):
+            with self._index_lock:
+                candidates = self.catalog.match_title(title, user_id=user_id, limit=limit)
+        return {"data": [dict(reminder, score=round(score, 3)) for score, reminder in candidates]}
+    
+    def find_reminder_by_id(self, reminder_id: str, user_id: Optional[str] = None) -> Dict:
+        """Reminder milik user berdasarkan ID, dari index lokal atau getReminder"""
+        with self._index_lock:
+            reminder = self.catalog.get(reminder_id, user_id=user_id)
+            indexed = reminder_id in self.catalog
+        if not indexed:
+            result = self._query("getReminder", {"id": reminder_id})
+            if "error" not in result:
+                with self._index_lock:
+                    reminder = self.catalog.get(reminder_id, user_id=user_id)
+        if reminder is None:
+            return {"error": f"Reminder #{reminder_id} tidak ditemukan"}
+        return {"data": reminder}
+    
+    def refresh_index(self) -> Dict:
+        """Reload local indexes from getReminders; run periodically in the background"""
+        with self._index_lock:
+            known = self.catalog.reminder_ids()
+        result = self.get_reminders()
+        if "error" in result:
+            return result
+        removed = self._reconcile(result, known)
+        with self._index_lock:
+            return {"data": {"indexed": len(self.catalog), "removed": removed}}
     
-    def search_reminders(self, search_term: str) -> Dict:
-        """Search reminders by title/description"""
-        return self._make_request("GET", "searchReminders", {"searchTerm": search_term})
+    def _refresh_user(self, user_id: Optional[str]) -> bool:
+        """Re-list one user's reminders after a miss, at most once per MISS_REFRESH_INTERVAL"""
+        if not user_id:
+            return False
+        now = time.monotonic()
+        with self._index_lock:
+            while self._user_refreshed and next(iter(self._user_refreshed.values())) <= now:
+                self._user_refreshed.popitem(last=False)
+            if user_id in self._user_refreshed:
+                return False
+            self._user_refreshed[user_id] = now + self.MISS_REFRESH_INTERVAL
+            known = self.catalog.reminder_ids(user_id)
+        
+        result = self._query("getRemindersByUser", {"userId": user_id})
+        if "error" in result:
+            return False
+        self._reconcile(result, known)
+        return True
+    
+    def _reconcile(self, result: Dict, known: Set[str]) -> int:
+        """Drop reminders indexed before a listing but missing from it (deleted by other clients)"""
+        present = {str(reminder["id"]) for reminder in self._extract_reminders(result)}
+        stale = list(known - present)
+        for start in range(0, len(stale), self.INDEX_BATCH):
+            with self._index_lock:
+                for reminder_id in stale[start:start + self.INDEX_BATCH]:
+                    self.catalog.remove(reminder_id)
+        return len(stale)
+    
+    def _query(self, endpoint: str, data: Optional[Dict] = None) -> Dict:
+        """Read-only canister call; identical concurrent queries share one request"""
+        return self.queries.do(self._query_key(endpoint, data), lambda: self._track(self._make_request("GET", endpoint, data)))
+    
+    @staticmethod
+    def _query_key(endpoint: str, data: Optional[Dict] = None) -> Hashable:
+        return (endpoint, json.dumps(data, sort_keys=True))
+    
+    def _track(self, result: Dict) -> Dict:
+        """Keep search index in sync with reminders returned by the canister"""
+        if "error" not in result:
+            reminders = self._extract_reminders(result)
+            # Index in batches so request threads are not held up behind a full listing
+            for start in range(0, len(reminders), self.INDEX_BATCH):
+                with self._index_lock:
+                    for reminder in reminders[start:start + self.INDEX_BATCH]:
+                        self.catalog.add(reminder)
+        return result
+    
+    @staticmethod
+    def _extract_reminders(result: Any) -> List[Dict]:
+        data = result.get("data", result) if isinstance(result, dict) else result
+        if isinstance(data, dict):
+            return [data] if "id" in data else []
+        if isinstance(data, list):
+            return [item for item in data if isinstance(item, dict) and "id" in item]
+        return []
 
 # Initialize ICP client
-icp_client = ICPClient(ICP_CANISTER_URL)
+icp_client = ICPClient(ICP_CANISTER_URL, query_ttl=ICP_QUERY_TTL)
+
+# Initialize outbound reply batching
+outbox = OutboundBatcher("response", "data", OUTBOUND_COALESCE_WINDOW)
 
 class ReminderParser:
     """Natural Language Processing untuk parsing perintah reminder"""
@@ -197,6 +341,30 @@ class ReminderParser:
             "time": target_time
         }
     
+    @staticmethod
+    def parse_search_request(message: str) -> Optional[str]:
+        """Parse perintah pencarian reminder, return kata kunci"""
+        match = re.search(r"^(?:cari|search|find)\s+(?:reminder\s+|jadwal\s+)?(.+)$", message.lower().strip())
+        if match:
+            return match.group(1).strip()
+        return None
+    
+    @staticmethod
+    def parse_delete_id(message: str) -> Optional[str]:
+        """Parse perintah hapus reminder berdasarkan ID, contoh: 'hapus reminder #reminder_3'"""
+        match = re.search(r"^(?:hapus|delete|batalkan|cancel|remove)\s+(?:reminder\s+|jadwal\s+)?#(\S+)$", message.strip(), re.IGNORECASE)
+        if match:
+            return match.group(1)
+        return None
+    
+    @staticmethod
+    def parse_delete_request(message: str) -> Optional[str]:
+        """Parse perintah hapus reminder, return judul yang disebutkan"""
+        match = re.search(r"^(?:hapus|delete|batalkan|cancel|remove)\s+(?:reminder\s+|jadwal\s+)?(.+)$", message.lower().strip())
+        if match and match.group(1).strip() not in ("reminder", "jadwal"):
+            return match.group(1).strip()
+        return None
+    
     @staticmethod
     def is_query_request(message: str) -> bool:
         """Check if message is asking for reminders"""
@@ -219,6 +387,15 @@ async def startup_message(ctx: Context):
     ctx.logger.info(f"📡 Connected to ICP Canister: {ICP_CANISTER_URL}")
     ctx.logger.info(f"🔗 Agent address: {agent.address}")
 
+@agent.on_interval(period=INDEX_REFRESH_TTL)
+async def refresh_index(ctx: Context):
+    """Reload local search indexes in the background, off the request path"""
+    result = await asyncio.to_thread(icp_client.refresh_index)
+    if "error" in result:
+        ctx.logger.warning(f"⚠️ Index refresh failed: {result['error']}")
+    elif result["data"]["removed"]:
+        ctx.logger.info(f"🧹 Dropped {result['data']['removed']} deleted reminders from the local index")
+
 @agent.on_message(model=ReminderRequest)
 async def handle_reminder_request(ctx: Context, sender: str, msg: ReminderRequest):
     """Handle incoming reminder requests"""
@@ -228,10 +405,95 @@ async def handle_reminder_request(ctx: Context, sender: str, msg: ReminderReques
         
         ctx.logger.info(f"📨 Received message from {sender}: {message}")
         
+        # Handle search requests
+        search_term = ReminderParser.parse_search_request(message)
+        if search_term:
+            result = await asyncio.to_thread(icp_client.search_reminders, search_term, user_id=user_id)
+            
+            if "error" in result:
+                response = f"❌ Gagal mencari reminder: {result['error']}"
+                success = False
+                data = None
+            else:
+                reminders = result.get("data", [])
+                if reminders:
+                    response = f"🔍 **Hasil pencarian '{search_term}':**\n\n"
+                    for i, reminder in enumerate(reminders, 1):
+                        response += f"{i}. **{reminder['title']}**\n"
+                        response += f"   📅 {reminder['date']} ⏰ {reminder['time']}\n\n"
+                else:
+                    response = f"📭 Tidak ada reminder yang cocok dengan '{search_term}'"
+                success = True
+                data = reminders
+            
+            await outbox.send(ctx, sender, ReminderResponse(
+                response=response, 
+                success=success, 
+                data=data
+            ))
+            return
+        
+        # Handle delete-by-id requests (confirmation for ambiguous titles)
+        delete_id = ReminderParser.parse_delete_id(message)
+        if delete_id:
+            result = await asyncio.to_thread(icp_client.find_reminder_by_id, delete_id, user_id=user_id)
+            if "error" in result:
+                response = f"❌ {result['error']}"
+                success = False
+            else:
+                target = result["data"]
+                delete_result = await asyncio.to_thread(icp_client.delete_reminder, delete_id)
+                if "error" in delete_result:
+                    response = f"❌ Gagal menghapus reminder: {delete_result['error']}"
+                    success = False
+                else:
+                    response = f"🗑️ Reminder '{target['title']}' ({target['date']} {target['time']}) berhasil dihapus"
+                    success = True
+            
+            await outbox.send(ctx, sender, ReminderResponse(response=response, success=success))
+            return
+        
+        # Handle delete-by-title requests
+        delete_title = ReminderParser.parse_delete_request(message)
+        if delete_title:
+            result = await asyncio.to_thread(icp_client.find_reminders_by_title, delete_title, user_id=user_id)
+            candidates = result.get("data") or []
+            # Deleting cannot be undone: only act on a single near-exact title, otherwise confirm by ID
+            target = unambiguous_match(candidates, DELETE_MATCH_SCORE)
+            
+            if "error" in result:
+                response = f"❌ Gagal mencari reminder: {result['error']}"
+                success = False
+            elif not candidates:
+                response = f"📭 Tidak ada reminder yang cocok dengan '{delete_title}'"
+                success = False
+            elif target is None:
+                response = f"🤔 Reminder mana yang ingin dihapus untuk '{delete_title}'?\n\n"
+                for i, reminder in enumerate(candidates, 1):
+                    response += f"{i}. **{reminder['title']}** #{reminder['id']} 📅 {reminder['date']} ⏰ {reminder['time']}\n"
+                response += f"\nKetik ID-nya untuk konfirmasi, contoh: 'Hapus reminder #{candidates[0]['id']}'"
+                success = False
+            else:
+                delete_result = await asyncio.to_thread(icp_client.delete_reminder, target["id"])
+                if "error" in delete_result:
+                    response = f"❌ Gagal menghapus reminder: {delete_result['error']}"
+                    success = False
+                else:
+                    response = f"🗑️ Reminder '{target['title']}' ({target['date']} {target['time']}) berhasil dihapus"
+                    success = True
+            
+            await outbox.send(ctx, sender, ReminderResponse(
+                response=response, 
+                success=success, 
+                data={"candidates": candidates} if candidates else None
+            ))
+            return
+        
         # Parse perintah tambah reminder
         reminder_data = ReminderParser.parse_add_reminder(message)
         if reminder_data:
-            result = icp_client.add_reminder(
+            result = await asyncio.to_thread(
+                icp_client.add_reminder,
                 title=reminder_data["title"],
                 description=reminder_data["description"],
                 date=reminder_data["date"],
@@ -246,7 +508,7 @@ async def handle_reminder_request(ctx: Context, sender: str, msg: ReminderReques
                 response = f"✅ Reminder '{reminder_data['title']}' berhasil disimpan!\n📅 Tanggal: {reminder_data['date']}\n⏰ Waktu: {reminder_data['time']}"
                 success = True
             
-            await ctx.send(sender, ReminderResponse(
+            await outbox.send(ctx, sender, ReminderResponse(
                 response=response, 
                 success=success, 
                 data=result if success else None
@@ -255,14 +517,15 @@ async def handle_reminder_request(ctx: Context, sender: str, msg: ReminderReques
         
         # Handle query requests
         if ReminderParser.is_query_request(message):
+            # Run in a worker thread so concurrent identical queries can be coalesced
             if "besok" in message.lower():
                 tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
-                result = icp_client.get_reminders_by_date(tomorrow)
+                result = await asyncio.to_thread(icp_client.get_reminders_by_date, tomorrow)
             elif "hari ini" in message.lower():
                 today = datetime.now().strftime("%Y-%m-%d")
-                result = icp_client.get_reminders_by_date(today)
+                result = await asyncio.to_thread(icp_client.get_reminders_by_date, today)
             else:
-                result = icp_client.get_upcoming_reminders()
+                result = await asyncio.to_thread(icp_client.get_upcoming_reminders)
             
             if "error" in result:
                 response = f"❌ Gagal mengambil data: {result['error']}"
@@ -284,7 +547,7 @@ async def handle_reminder_request(ctx: Context, sender: str, msg: ReminderReques
                 success = True
                 data = reminders
             
-            await ctx.send(sender, ReminderResponse(
+            await outbox.send(ctx, sender, ReminderResponse(
                 response=response, 
                 success=success, 
                 data=data
@@ -294,8 +557,8 @@ async def handle_reminder_request(ctx: Context, sender: str, msg: ReminderReques
         # Handle delete requests
         if ReminderParser.is_delete_request(message):
             # Simple implementation - could be enhanced with specific ID parsing
-            response = "🗑️ Untuk menghapus reminder, silakan sebutkan ID atau judul reminder yang ingin dihapus.\n\nContoh: 'Hapus reminder meeting'"
-            await ctx.send(sender, ReminderResponse(response=response))
+            response = "🗑️ Untuk menghapus reminder, silakan sebutkan ID atau judul reminder yang ingin dihapus.\n\nContoh: 'Hapus reminder meeting' atau 'Hapus reminder #reminder_3'"
+            await outbox.send(ctx, sender, ReminderResponse(response=response))
             return
         
         # Default help response
@@ -311,6 +574,13 @@ async def handle_reminder_request(ctx: Context, sender: str, msg: ReminderReques
 • "Lihat reminder hari ini"
 • "Tampilkan semua jadwal"
 
+**Cari Reminder:**
+• "Cari reminder meeting"
+
+**Hapus Reminder:**
+• "Hapus reminder meeting"
+• "Hapus reminder #reminder_3"
+
 **Format Waktu:**
 • Relatif: besok, lusa, minggu depan
 • Spesifik: 25/12/2024, jam 14:30
@@ -318,12 +588,12 @@ async def handle_reminder_request(ctx: Context, sender: str, msg: ReminderReques
 
 💾 Semua data tersimpan aman di ICP Blockchain!"""
         
-        await ctx.send(sender, ReminderResponse(response=help_text))
+        await outbox.send(ctx, sender, ReminderResponse(response=help_text))
     
     except Exception as e:
         ctx.logger.error(f"❌ Error handling message: {str(e)}")
         error_response = f"❌ Terjadi kesalahan: {str(e)}\n\nSilakan coba lagi atau ketik 'help' untuk panduan."
-        await ctx.send(sender, ReminderResponse(
+        await outbox.send(ctx, sender, ReminderResponse(
             response=error_response, 
             success=False
         ))
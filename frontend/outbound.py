@@ -0,0 +1,65 @@
+"""Outbound reply coalescing: replies to one recipient within a short window share an envelope
+
+The agent/ and frontend/ agents are deployed separately (each directory is
+uploaded on its own with its own requirements), so each keeps an identical
+copy of this module.
+"""
+import asyncio
+from typing import Any, Dict, List
+
+
+class OutboundBatcher:
+    """Coalesce replies to the same recipient within a short window into fewer envelopes"""
+    def __init__(self, text_field: str, payload_field: str, window: float, max_batch: int = 20):
+        self.text_field = text_field
+        self.payload_field = payload_field
+        self.window = window
+        self.max_batch = max_batch
+        self.pending: Dict[str, List[Any]] = {}
+        self.flushers: Dict[str, asyncio.Task] = {}
+    
+    def merge(self, replies: List[Any]) -> List[Any]:
+        """Join consecutive replies that share a success value; payloads never overwrite each other"""
+        merged: List[Any] = []
+        for reply in replies:
+            previous = merged[-1] if merged else None
+            if (
+                previous is not None
+                and previous.success == reply.success
+                and not (getattr(previous, self.payload_field) and getattr(reply, self.payload_field))
+            ):
+                merged[-1] = type(reply)(**{
+                    self.text_field: f"{getattr(previous, self.text_field)}\n\n{getattr(reply, self.text_field)}",
+                    "success": reply.success,
+                    self.payload_field: getattr(previous, self.payload_field) or getattr(reply, self.payload_field),
+                })
+            else:
+                merged.append(reply)
+        return merged
+    
+    async def send(self, ctx: Any, recipient: str, message: Any) -> None:
+        if self.window <= 0:
+            await ctx.send(recipient, message)
+            return
+        
+        batch = self.pending.setdefault(recipient, [])
+        batch.append(message)
+        if len(batch) >= self.max_batch:
+            flusher = self.flushers.pop(recipient, None)
+            if flusher is not None:
+                flusher.cancel()
+            await self.flush(ctx, recipient)
+        elif recipient not in self.flushers:
+            self.flushers[recipient] = asyncio.create_task(self.flush_later(ctx, recipient))
+    
+    async def flush_later(self, ctx: Any, recipient: str) -> None:
+        await asyncio.sleep(self.window)
+        self.flushers.pop(recipient, None)
+        await self.flush(ctx, recipient)
+    
+    async def flush(self, ctx: Any, recipient: str) -> None:
+        for envelope in self.merge(self.pending.pop(recipient, [])):
+            try:
+                await ctx.send(recipient, envelope)
+            except Exception as e:
+                ctx.logger.error(f"Error sending reply to {recipient}: {str(e)}")
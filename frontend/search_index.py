@@ -0,0 +1,229 @@
+"""Local reminder indexes: full-text search and fuzzy title matching over one shared reminder store"""
+import bisect
+import heapq
+import re
+import unicodedata
+from typing import Optional, Dict, List, Set, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+def normalize(text: str) -> str:
+    """Case- dan accent-folding (Indonesia/English)"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return stripped.casefold()
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(normalize(text))
+
+class ReminderSearchIndex:
+    """Inverted index full-text search untuk reminder (title + description)"""
+    
+    def __init__(self, store: Dict[str, Dict]):
+        self._store = store  # id -> reminder, owned by ReminderCatalog
+        self._postings: Dict[str, Dict[str, Set[str]]] = {}  # user -> token -> reminder ids
+        self._terms: Dict[str, List[str]] = {}  # user -> sorted vocabulary untuk prefix lookup
+        self._docs: Dict[str, Tuple[Tuple[int, int], str, Set[str]]] = {}  # id -> (recency, user, tokens)
+        self._seq = 0
+    
+    def __len__(self) -> int:
+        return len(self._docs)
+    
+    def __contains__(self, reminder_id: str) -> bool:
+        return reminder_id in self._docs
+    
+    def add(self, reminder_id: str, reminder: Dict) -> None:
+        user_id = reminder.get("userId") or ""
+        user_postings = self._postings.setdefault(user_id, {})
+        user_terms = self._terms.setdefault(user_id, [])
+        tokens = set(tokenize(f"{reminder.get('title', '')} {reminder.get('description', '')}"))
+        for token in tokens:
+            postings = user_postings.get(token)
+            if postings is None:
+                postings = user_postings[token] = set()
+                bisect.insort(user_terms, token)
+            postings.add(reminder_id)
+        
+        self._seq += 1
+        self._docs[reminder_id] = ((self._recency(reminder), self._seq), user_id, tokens)
+    
+    def remove(self, reminder_id: str) -> None:
+        doc = self._docs.pop(reminder_id, None)
+        if doc is None:
+            return
+        user_id = doc[1]
+        user_postings = self._postings[user_id]
+        user_terms = self._terms[user_id]
+        for token in doc[2]:
+            postings = user_postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(reminder_id)
+            if not postings:
+                del user_postings[token]
+                del user_terms[bisect.bisect_left(user_terms, token)]
+        if not user_postings:
+            del self._postings[user_id]
+            del self._terms[user_id]
+    
+    def search(self, query: str, limit: int = 10, user_id: Optional[str] = None) -> List[Dict]:
+        """Cari reminder milik user; token terakhir diperlakukan sebagai prefix, hasil terbaru dulu"""
+        tokens = tokenize(query)
+        user_postings = self._postings.get(user_id or "")
+        if not tokens or user_postings is None:
+            return []
+        
+        candidate_sets = [user_postings.get(token, set()) for token in tokens[:-1]]
+        candidate_sets.append(self._prefix_postings(user_id or "", tokens[-1]))
+        candidate_sets.sort(key=len)
+        
+        matches = set(candidate_sets[0])
+        for postings in candidate_sets[1:]:
+            if not matches:
+                break
+            matches &= postings
+        
+        top_ids = heapq.nlargest(limit, matches, key=lambda rid: self._docs[rid][0])
+        return [self._store[rid] for rid in top_ids]
+    
+    def _prefix_postings(self, user_id: str, prefix: str) -> Set[str]:
+        user_postings = self._postings[user_id]
+        user_terms = self._terms[user_id]
+        start = bisect.bisect_left(user_terms, prefix)
+        end = bisect.bisect_left(user_terms, prefix + "\U0010ffff")
+        if end - start == 1:
+            return user_postings[user_terms[start]]
+        result: Set[str] = set()
+        for term in user_terms[start:end]:
+            result |= user_postings[term]
+        return result
+    
+    @staticmethod
+    def _recency(reminder: Dict) -> int:
+        try:
+            return int(reminder.get("created") or 0)
+        except (TypeError, ValueError):
+            return 0
+
+class TitleTrigramIndex:
+    """Per-user trigram index atas judul reminder untuk fuzzy matching"""
+    
+    def __init__(self, store: Dict[str, Dict]):
+        self._store = store  # id -> reminder, owned by ReminderCatalog
+        self._postings: Dict[str, Dict[str, Set[str]]] = {}  # user -> trigram -> reminder ids
+        self._titles: Dict[str, Tuple[str, Set[str]]] = {}  # reminder id -> (user, trigrams)
+    
+    @staticmethod
+    def trigrams(text: str) -> Set[str]:
+        padded = f"  {' '.join(tokenize(text))} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+    
+    def add(self, reminder_id: str, reminder: Dict) -> None:
+        user_id = reminder.get("userId") or ""
+        grams = self.trigrams(reminder.get("title", ""))
+        user_postings = self._postings.setdefault(user_id, {})
+        for gram in grams:
+            user_postings.setdefault(gram, set()).add(reminder_id)
+        self._titles[reminder_id] = (user_id, grams)
+    
+    def remove(self, reminder_id: str) -> None:
+        entry = self._titles.pop(reminder_id, None)
+        if entry is None:
+            return
+        user_id, grams = entry
+        user_postings = self._postings[user_id]
+        for gram in grams:
+            ids = user_postings.get(gram)
+            if ids is not None:
+                ids.discard(reminder_id)
+                if not ids:
+                    del user_postings[gram]
+        if not user_postings:
+            del self._postings[user_id]
+    
+    def match(self, title: str, user_id: Optional[str] = None, limit: int = 5, threshold: float = 0.35) -> List[Tuple[float, Dict]]:
+        """Kandidat reminder milik user, diurutkan dari skor Dice tertinggi"""
+        query_grams = self.trigrams(title)
+        user_postings = self._postings.get(user_id or "", {})
+        
+        overlap: Dict[str, int] = {}
+        for gram in query_grams:
+            for reminder_id in user_postings.get(gram, ()):
+                overlap[reminder_id] = overlap.get(reminder_id, 0) + 1
+        
+        scored = []
+        for reminder_id, shared in overlap.items():
+            score = 2 * shared / (len(query_grams) + len(self._titles[reminder_id][1]))
+            if score >= threshold:
+                scored.append((score, reminder_id))
+        return [(score, self._store[reminder_id]) for score, reminder_id in heapq.nlargest(limit, scored, key=lambda item: item[0])]
+
+class ReminderCatalog:
+    """Stores each reminder once and keeps the search and title indexes over it in sync"""
+    
+    def __init__(self):
+        self.reminders: Dict[str, Dict] = {}  # reminder id -> reminder, shared by both indexes
+        self._user_ids: Dict[str, Set[str]] = {}  # user -> reminder ids, so per-user reconcile is O(user)
+        self.search_index = ReminderSearchIndex(self.reminders)
+        self.title_index = TitleTrigramIndex(self.reminders)
+    
+    def __len__(self) -> int:
+        return len(self.reminders)
+    
+    def __contains__(self, reminder_id: str) -> bool:
+        return str(reminder_id) in self.reminders
+    
+    def add(self, reminder: Dict) -> None:
+        """Index reminder baru atau re-index reminder yang diupdate"""
+        reminder_id = reminder.get("id")
+        if reminder_id is None:
+            return
+        reminder_id = str(reminder_id)
+        existing = self.reminders.get(reminder_id)
+        if existing is not None:
+            if existing == reminder:
+                return  # Unchanged, skip re-indexing
+            self.remove(reminder_id)
+        
+        self.reminders[reminder_id] = reminder
+        self._user_ids.setdefault(reminder.get("userId") or "", set()).add(reminder_id)
+        self.search_index.add(reminder_id, reminder)
+        self.title_index.add(reminder_id, reminder)
+    
+    def remove(self, reminder_id: str) -> None:
+        """Hapus reminder dari store dan semua index"""
+        reminder_id = str(reminder_id)
+        reminder = self.reminders.pop(reminder_id, None)
+        if reminder is None:
+            return
+        user_id = reminder.get("userId") or ""
+        user_ids = self._user_ids[user_id]
+        user_ids.discard(reminder_id)
+        if not user_ids:
+            del self._user_ids[user_id]
+        self.search_index.remove(reminder_id)
+        self.title_index.remove(reminder_id)
+    
+    def reminder_ids(self, user_id: Optional[str] = None) -> Set[str]:
+        """Indexed reminder ids, optionally only those of one user"""
+        if user_id is None:
+            return set(self.reminders)
+        return set(self._user_ids.get(user_id, ()))
+    
+    def get(self, reminder_id: str, user_id: Optional[str] = None) -> Optional[Dict]:
+        """Reminder by id, only if it belongs to user_id (when given)"""
+        reminder = self.reminders.get(str(reminder_id))
+        if reminder is None or (user_id is not None and (reminder.get("userId") or "") != user_id):
+            return None
+        return reminder
+    
+    def search(self, query: str, limit: int = 10, user_id: Optional[str] = None) -> List[Dict]:
+        return self.search_index.search(query, limit=limit, user_id=user_id)
+    
+    def match_title(self, title: str, user_id: Optional[str] = None, limit: int = 5) -> List[Tuple[float, Dict]]:
+        return self.title_index.match(title, user_id=user_id, limit=limit)
+
+def unambiguous_match(candidates: List[Dict], min_score: float) -> Optional[Dict]:
+    """The single candidate scoring at least min_score; None when there is none or several tie"""
+    confident = [candidate for candidate in candidates if candidate["score"] >= min_score]
+    return confident[0] if len(confident) == 1 else None
@@ -0,0 +1,81 @@
+"""Single-flight request sharing: identical concurrent calls wait on one outstanding call"""
+import threading
+import time
+from typing import Optional, Dict, Tuple, Any, Callable, Hashable
+
+class _Flight:
+    """Satu panggilan yang sedang berjalan, ditunggu oleh caller lain"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """Coalesce identical concurrent calls into one outstanding call, with optional micro-TTL"""
+    
+    MAX_CACHED = 1024
+    
+    def __init__(self, ttl: float = 0.0, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._cache: Dict[Hashable, Tuple[float, Any]] = {}
+        self._generation = 0  # Bumped on invalidate so in-flight results started earlier are not cached
+    
+    def invalidate(self, *keys: Hashable) -> None:
+        """Drop cached results for the given keys, or all of them when no key is given"""
+        with self._lock:
+            self._generation += 1
+            if not keys:
+                self._cache.clear()
+            for key in keys:
+                self._cache.pop(key, None)
+    
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                if cached[0] > self.clock():
+                    return cached[1]
+                del self._cache[key]
+            
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                generation = self._generation
+        
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                fresh = generation == self._generation
+                if self.ttl > 0 and fresh and flight.error is None and not self._is_error(flight.result):
+                    self._store(key, flight.result)
+            flight.done.set()
+        
+        return flight.result
+    
+    def _store(self, key: Hashable, result: Any) -> None:
+        now = self.clock()
+        if len(self._cache) >= self.MAX_CACHED:
+            self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+            if len(self._cache) >= self.MAX_CACHED:
+                self._cache.pop(next(iter(self._cache)))
+        self._cache[key] = (now + self.ttl, result)
+    
+    @staticmethod
+    def _is_error(result: Any) -> bool:
+        return isinstance(result, dict) and "error" in result
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Frontend modules are imported as top-level scripts (python main.py from frontend/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,139 @@
+from search_index import ReminderCatalog, tokenize, unambiguous_match
+
+
+def reminder(reminder_id, title, user="alice", created=0, description=""):
+    return {"id": reminder_id, "title": title, "description": description, "userId": user, "created": created}
+
+
+def titles(results):
+    return [item["title"] for item in results]
+
+
+def test_tokenize_folds_case_and_accents():
+    assert tokenize("Rapat CAFÉ, jam 10!") == ["rapat", "cafe", "jam", "10"]
+
+
+def test_search_is_scoped_to_user():
+    catalog = ReminderCatalog()
+    catalog.add(reminder(1, "Meeting tim", user="alice"))
+    catalog.add(reminder(2, "Meeting klien", user="bob"))
+    assert titles(catalog.search("meeting", user_id="alice")) == ["Meeting tim"]
+    assert titles(catalog.search("meeting", user_id="bob")) == ["Meeting klien"]
+    assert catalog.search("meeting", user_id="carol") == []
+
+
+def test_last_token_is_a_prefix_and_earlier_tokens_are_exact():
+    catalog = ReminderCatalog()
+    catalog.add(reminder(1, "Meeting tim", created=1))
+    catalog.add(reminder(2, "Meetup komunitas", created=2))
+    catalog.add(reminder(3, "Olahraga pagi", created=3, description="meet pelatih"))
+    assert titles(catalog.search("meet")) == []  # no user given, alice's reminders are not visible
+    assert titles(catalog.search("meet", user_id="alice")) == ["Olahraga pagi", "Meetup komunitas", "Meeting tim"]
+    assert titles(catalog.search("meeting ti", user_id="alice")) == ["Meeting tim"]
+    assert catalog.search("mee tim", user_id="alice") == []
+
+
+def test_results_are_most_recent_first_and_limited():
+    catalog = ReminderCatalog()
+    for i in range(5):
+        catalog.add(reminder(i, f"Minum obat {i}", created=i))
+    assert titles(catalog.search("obat", limit=2, user_id="alice")) == ["Minum obat 4", "Minum obat 3"]
+
+
+def test_update_reindexes_and_drops_old_vocabulary():
+    catalog = ReminderCatalog()
+    catalog.add(reminder(1, "Meeting tim"))
+    catalog.add(reminder(1, "Olahraga pagi"))
+    assert catalog.search("meeting", user_id="alice") == []
+    assert titles(catalog.search("olah", user_id="alice")) == ["Olahraga pagi"]
+    assert catalog.search_index._terms["alice"] == ["olahraga", "pagi"]
+
+
+def test_unchanged_reminder_is_not_reindexed():
+    catalog = ReminderCatalog()
+    catalog.add(reminder(1, "Meeting tim"))
+    seq = catalog.search_index._seq
+    catalog.add(reminder(1, "Meeting tim"))
+    assert catalog.search_index._seq == seq
+
+
+def test_remove_cleans_up_postings_and_vocabulary():
+    catalog = ReminderCatalog()
+    catalog.add(reminder(1, "Meeting tim"))
+    catalog.add(reminder(2, "Meeting klien"))
+    catalog.remove(1)
+    assert titles(catalog.search("meeting", user_id="alice")) == ["Meeting klien"]
+    assert catalog.search_index._terms["alice"] == ["klien", "meeting"]
+    catalog.remove("2")
+    assert len(catalog) == 0 and len(catalog.search_index) == 0
+    assert not catalog.search_index._postings and not catalog.search_index._terms
+    catalog.remove("2")  # Removing twice is a no-op
+
+
+def test_reminders_are_stored_once():
+    catalog = ReminderCatalog()
+    item = reminder(1, "Meeting tim")
+    catalog.add(item)
+    assert catalog.search("meeting", user_id="alice")[0] is item
+    assert catalog.match_title("meeting tim", user_id="alice")[0][1] is item
+    assert catalog.reminders == {"1": item}
+
+
+def candidates(catalog, title, user_id="alice"):
+    return [dict(item, score=score) for score, item in catalog.match_title(title, user_id=user_id)]
+
+
+def test_title_match_ranks_by_similarity_and_tolerates_typos():
+    catalog = ReminderCatalog()
+    catalog.add(reminder(1, "Meeting tim"))
+    catalog.add(reminder(2, "Meeting klien"))
+    catalog.add(reminder(3, "Olahraga pagi"))
+    ranked = catalog.match_title("meeting klein", user_id="alice")
+    assert [item["title"] for _, item in ranked][:2] == ["Meeting klien", "Meeting tim"]
+    assert ranked[0][0] > ranked[1][0]
+    assert catalog.match_title("Meeting klien", user_id="alice")[0][0] == 1.0
+    assert catalog.match_title("meeting klien", user_id="bob") == []
+
+
+def test_title_index_follows_updates_and_removes():
+    catalog = ReminderCatalog()
+    catalog.add(reminder(1, "Meeting tim"))
+    catalog.add(reminder(1, "Olahraga pagi"))
+    assert catalog.match_title("meeting tim", user_id="alice") == []
+    catalog.remove(1)
+    assert catalog.match_title("olahraga pagi", user_id="alice") == []
+    assert not catalog.title_index._postings and not catalog.title_index._titles
+
+
+def test_reminder_ids_and_get_are_scoped_to_user():
+    catalog = ReminderCatalog()
+    catalog.add(reminder(1, "Meeting tim", user="alice"))
+    catalog.add(reminder(2, "Meeting klien", user="bob"))
+    assert catalog.reminder_ids("alice") == {"1"}
+    assert catalog.reminder_ids() == {"1", "2"}
+    assert catalog.get("2", user_id="alice") is None
+    assert catalog.get("2", user_id="bob")["title"] == "Meeting klien"
+    catalog.remove(2)
+    assert catalog.reminder_ids("bob") == set()
+    assert "bob" not in catalog._user_ids
+
+
+def test_unambiguous_match_requires_a_single_confident_candidate():
+    catalog = ReminderCatalog()
+    catalog.add(reminder(1, "Minum obat", created=1))
+    catalog.add(reminder(2, "Olahraga pagi", created=2))
+    assert unambiguous_match(candidates(catalog, "minum obat"), 0.9)["id"] == 1
+    assert unambiguous_match(candidates(catalog, "minum"), 0.9) is None
+
+
+def test_identical_titles_tie_and_are_resolved_by_id():
+    catalog = ReminderCatalog()
+    catalog.add(reminder("r1", "Minum obat", created=1))
+    catalog.add(reminder("r2", "Minum obat", created=2))
+    tied = candidates(catalog, "Minum obat")
+    assert [item["score"] for item in tied] == [1.0, 1.0]
+    # Retyping the full title ties again, so confirmation has to go by id
+    assert unambiguous_match(tied, 0.9) is None
+    assert unambiguous_match(candidates(catalog, "minum obat"), 0.9) is None
+    assert {item["id"] for item in tied} == {"r1", "r2"}
+    assert catalog.get("r2", user_id="alice")["created"] == 2
@@ -0,0 +1,140 @@
+import threading
+import time
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run_concurrently(flight, key, fn, callers):
+    """Start callers that all ask for key; return their results (or raised errors)"""
+    results = [None] * callers
+
+    def call(i):
+        try:
+            results[i] = flight.do(key, fn)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(timeout=5)
+        return {"data": [1, 2, 3]}
+
+    threads, results = run_concurrently(flight, "getReminders", fetch, 8)
+    time.sleep(0.1)  # Let every caller join the outstanding flight
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert results[0] == {"data": [1, 2, 3]}
+    assert not flight._flights
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    flight = SingleFlight(ttl=60)
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(timeout=5)
+        raise ConnectionError("canister down")
+
+    threads, results = run_concurrently(flight, "getReminders", fetch, 4)
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert len(calls) == 1
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert flight.do("getReminders", lambda: "recovered") == "recovered"
+
+
+def test_results_are_cached_for_ttl_unless_they_are_errors():
+    clock = FakeClock()
+    flight = SingleFlight(ttl=1.0, clock=clock)
+    assert flight.do("a", lambda: {"error": "timeout"}) == {"error": "timeout"}
+    assert flight.do("a", lambda: "fresh") == "fresh"
+    assert flight.do("a", lambda: "newer") == "fresh"
+    clock.now = 1.0
+    assert flight.do("a", lambda: "newer") == "newer"
+
+
+def test_invalidate_drops_selected_or_all_keys():
+    flight = SingleFlight(ttl=60, clock=FakeClock())
+    for key in ("a", "b", "c"):
+        flight.do(key, lambda: "old")
+    flight.invalidate("a")
+    assert [flight.do(key, lambda: "new") for key in ("a", "b", "c")] == ["new", "old", "old"]
+    flight.invalidate()
+    assert [flight.do(key, lambda: "newest") for key in ("a", "b", "c")] == ["newest"] * 3
+
+
+def test_result_started_before_invalidate_is_not_cached():
+    flight = SingleFlight(ttl=60)
+    started = threading.Event()
+    release = threading.Event()
+
+    def stale_fetch():
+        started.set()
+        release.wait(timeout=5)
+        return "stale"
+
+    threads, results = run_concurrently(flight, "getReminders", stale_fetch, 1)
+    assert started.wait(timeout=5)
+    flight.invalidate()  # A write lands while the query is still in flight
+    release.set()
+    threads[0].join(timeout=5)
+
+    assert results == ["stale"]  # The in-flight caller still gets its answer
+    assert flight.do("getReminders", lambda: "fresh") == "fresh"
+
+
+def test_cache_is_trimmed_to_max_cached():
+    clock = FakeClock()
+    flight = SingleFlight(ttl=10, clock=clock)
+    flight.MAX_CACHED = 2
+    flight.do("a", lambda: 1)
+    flight.do("b", lambda: 2)
+    flight.do("c", lambda: 3)  # Full of live entries: the oldest one goes
+    assert list(flight._cache) == ["b", "c"]
+
+    clock.now = 5
+    flight.do("d", lambda: 4)
+    clock.now = 12  # "b" and "c" have expired, "d" has not
+    flight.do("e", lambda: 5)
+    assert list(flight._cache) == ["d", "e"]
+
+
+def test_leader_exception_propagates_to_leader():
+    flight = SingleFlight()
+
+    def fetch():
+        raise ValueError("bad")
+
+    with pytest.raises(ValueError):
+        flight.do("a", fetch)
+    assert not flight._flights